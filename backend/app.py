@@ -1,555 +1,1103 @@
 from flask import Flask, request, jsonify, send_file
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 import os
 import io
 import tempfile
 import subprocess
+import shutil
+import stat
+import queue
+import atexit
+import contextlib
+import fcntl
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import json
+import re
+import hashlib
+import hmac
+import orjson
+import jinja2
+from cachetools import LRUCache
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+from dataclasses import dataclass
 from datetime import datetime
 
+# ReportLab is imported once here; without it only the pdflatex engine is available
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import ActionFlowable, BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    _RL_AVAILABLE = True
+except ImportError:
+    _RL_AVAILABLE = False
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
-def generate_latex_document(form_data):
-    """Generate LaTeX code for IEEE conference paper based on form data"""
-    
-    # Process title and funding
-    title = form_data.get('title', 'Conference Paper Title*')
-    funding = form_data.get('funding', '')
-    paper_notice = form_data.get('paperNotice', '')
-    drop_cap = form_data.get('dropCap', True)
-    
-    title_latex = f"{title}*\\\\\n{{\\footnotesize \\textsuperscript{{*}}Note: Sub-titles are not captured for https://ieeexplore.ieee.org and should not be used}}"
-    
-    if funding:
-        title_latex += f"\n\\thanks{{{funding}}}"
-    
-    # Process authors
-    authors = form_data.get('authors', [])
-    author_blocks = []
-    
-    for i, author in enumerate(authors):
-        # Format:
-        # \IEEEauthorblockN{1\textsuperscript{st} Given Name Surname \IEEEmembership{Member, IEEE}}
-        
-        ordinal_suffix = "th"
-        if (i + 1) % 10 == 1 and (i + 1) % 100 != 11:
-            ordinal_suffix = "st"
-        elif (i + 1) % 10 == 2 and (i + 1) % 100 != 12:
-            ordinal_suffix = "nd"
-        elif (i + 1) % 10 == 3 and (i + 1) % 100 != 13:
-            ordinal_suffix = "rd"
-            
-        ordinal = f"{i + 1}\\textsuperscript{{{ordinal_suffix}}}"
-        
-        name = f"{ordinal} {author.get('firstName', '')} {author.get('lastName', '')}"
-        membership = author.get('membership', '')
-        if membership:
-            name += f" \\IEEEmembership{{{membership}}}"
-            
-        dept = author.get('department', '')
-        org = author.get('organization', '')
-        loc = author.get('cityCountry', '')
-        email = author.get('email', '')
-        
-        block = f"\\IEEEauthorblockN{{{name}}}\n"
-        block += f"\\IEEEauthorblockA{{\\textit{{{dept}}} \\\\\n"
-        block += f"\\textit{{{org}}}\\\\\n"
-        block += f"{loc} \\\\\n"
-        block += f"{email}}}"
-        
-        author_blocks.append(block)
-        
-    authors_str = '\n\\and\n'.join(author_blocks)
-    
-    # Process abstract
-    abstract = form_data.get('abstract', '')
-    
-    # Process keywords
-    keywords = form_data.get('keywords', '')
-    
-    # Process sections
-    sections = form_data.get('sections', [])
-    sections_latex = []
-        
-    for i, section in enumerate(sections):
-        title_sec = section.get('title', 'Section')
-        content_sec = section.get('content', '')
-        
-        # Handle Drop Cap for the first section if enabled
-        if i == 0 and drop_cap and content_sec:
-            # \IEEEPARstart{F}{irst} word...
-            # We need to split the first word
-            words = content_sec.split(' ', 1)
-            if words:
-                first_word = words[0]
-                rest_of_text = words[1] if len(words) > 1 else ''
-                
-                if len(first_word) > 1:
-                    first_letter = first_word[0]
-                    rest_of_word = first_word[1:]
-                    content_sec = f"\\IEEEPARstart{{{first_letter}}}{{{rest_of_word}}} {rest_of_text}"
-                else:
-                    # Single letter word? unusual but handle it
-                    content_sec = f"\\IEEEPARstart{{{first_word}}}{{}} {rest_of_text}"
-        
-        sections_latex.append(f"\\section{{{title_sec}}}\n{content_sec}")
-    
-    # Join sections
-    sections_content = '\n\n'.join(sections_latex)
-    
-    # Process references
-    references = form_data.get('references', '')
-    
-    # Create the complete LaTeX document
-    # Inject special paper notice if present
-    special_notice_cmd = ""
-    if paper_notice:
-        special_notice_cmd = f"\\IEEEspecialpapernotice{{{paper_notice}}}\n"
-
-    latex_template = f"""\\documentclass[conference]{{IEEEtran}}
-\\IEEEoverridecommandlockouts
+# LaTeX source for the IEEE conference paper. Jinja2 delimiters are swapped for
+# << >> / <% %> so they don't clash with LaTeX braces. Plain-text fields go
+# through the |tex filter; section content and references are LaTeX already.
+TEMPLATE_SRC = r"""\documentclass[conference]{IEEEtran}
+\IEEEoverridecommandlockouts
 % The preceding line is only needed to identify funding in the first footnote. If that is unneeded, please comment it out.
 %Template version as of 6/27/2024
 
-\\usepackage{{cite}}
-\\usepackage{{amsmath,amssymb,amsfonts}}
-\\usepackage{{algorithmic}}
-\\usepackage{{graphicx}}
-\\usepackage{{textcomp}}
-\\usepackage{{xcolor}}
-\\def\\BibTeX{{{{\\rm B\\kern-.05em{{\\sc i\\kern-.025em b}}\\kern-.08em
-    T\\kern-.1667em\\lower.7ex\\hbox{{E}}\\kern-.125emX}}}}
-\\begin{{document}}
+\usepackage{cite}
+\usepackage{amsmath,amssymb,amsfonts}
+\usepackage{algorithmic}
+\usepackage{graphicx}
+\usepackage{textcomp}
+\usepackage{xcolor}
+\def\BibTeX{{\rm B\kern-.05em{\sc i\kern-.025em b}\kern-.08em
+    T\kern-.1667em\lower.7ex\hbox{E}\kern-.125emX}}
+\begin{document}
 
-\\title{{{title_latex}}}
+\title{<< title|tex >>*\\
+{\footnotesize \textsuperscript{*}Note: Sub-titles are not captured for https://ieeexplore.ieee.org and should not be used}
+<%- if funding %>
+\thanks{<< funding|tex >>}
+<%- endif %>}
 
-{special_notice_cmd}
-\\author{{{authors_str}}}
+<% if paper_notice %>\IEEEspecialpapernotice{<< paper_notice|tex >>}
+<% endif %>
+\author{
+<%- for author in authors %>
+<%- if not loop.first %>
+\and
+<% endif -%>
+\IEEEauthorblockN{<< loop.index >>\textsuperscript{<< loop.index|ordinal >>} << author.firstName|tex >> << author.lastName|tex >>
+<%- if author.membership %> \IEEEmembership{<< author.membership|tex >>}<% endif %>}
+\IEEEauthorblockA{\textit{<< author.department|tex >>} \\
+\textit{<< author.organization|tex >>}\\
+<< author.cityCountry|tex >> \\
+<< author.email|tex >>}
+<%- endfor %>}
 
-\\maketitle
+\maketitle
 
-\\begin{{abstract}}
-{abstract}
-\\end{{abstract}}
+\begin{abstract}
+<< abstract|tex >>
+\end{abstract}
 
-\\begin{{IEEEkeywords}}
-{keywords}
-\\end{{IEEEkeywords}}
+\begin{IEEEkeywords}
+<< keywords|tex >>
+\end{IEEEkeywords}
 
-{sections_content}
+<% for section in sections -%>
+<% if not loop.first %>
 
-\\begin{{thebibliography}}{{00}}
-{references}
-\\end{{thebibliography}}
+<% endif -%>
+\section{<< section.title|tex >>}
+<% if loop.first and drop_cap and section.content -%>
+<< section.content|dropcap >>
+<%- else -%>
+<< section.content >>
+<%- endif %>
+<%- endfor %>
 
-\\end{{document}}"""
-    
-    return latex_template
+\begin{thebibliography}{00}
+<% for ref in references %><< ref >>
+<% endfor -%>
+\end{thebibliography}
+
+\end{document}"""
+
+# Whole-line comments and runs of blank lines are only noise for pdflatex's
+# tokenizer, so drop them once here. Only lines *starting* with % are removed,
+# which leaves the \def\BibTeX definition and any inline % untouched.
+_COMMENT_RE = re.compile(r'(?m)^[ \t]*%.*\n?')
+_BLANK_RE = re.compile(r'\n{3,}')
+TEMPLATE_SRC = _BLANK_RE.sub('\n\n', _COMMENT_RE.sub('', TEMPLATE_SRC))
+
+
+def _compute_ordinal(n):
+    """Compute the English ordinal suffix (st, nd, rd, th) for n"""
+    if n % 10 == 1 and n % 100 != 11:
+        return "st"
+    elif n % 10 == 2 and n % 100 != 12:
+        return "nd"
+    elif n % 10 == 3 and n % 100 != 13:
+        return "rd"
+    return "th"
+
+# Suffixes for every realistic author position, looked up instead of recomputed
+_ORDINAL_SUFFIXES = tuple(_compute_ordinal(n) for n in range(256))
+
+def _ordinal(n):
+    """Return the English ordinal suffix (st, nd, rd, th) for n"""
+    if 0 <= n < 256:
+        return _ORDINAL_SUFFIXES[n]
+    return _compute_ordinal(n)
+
+
+# Characters with a special meaning in LaTeX, escaped in a single translate() pass
+_LATEX_ESCAPE = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+})
+
+def _tex(value):
+    """Escape plain text for use inside the LaTeX document"""
+    return str(value).translate(_LATEX_ESCAPE)
+
+
+def _dropcap(content):
+    """Wrap the first word of content in \\IEEEPARstart"""
+    # \IEEEPARstart{F}{irst} word...
+    words = content.split(' ', 1)
+    first_word = words[0]
+    rest_of_text = words[1] if len(words) > 1 else ''
+
+    if len(first_word) > 1:
+        return f"\\IEEEPARstart{{{first_word[0]}}}{{{first_word[1:]}}} {rest_of_text}"
+    # Single letter word? unusual but handle it
+    return f"\\IEEEPARstart{{{first_word}}}{{}} {rest_of_text}"
+
+
+_ENV = jinja2.Environment(
+    variable_start_string='<<',
+    variable_end_string='>>',
+    block_start_string='<%',
+    block_end_string='%>',
+    comment_start_string='<#',
+    comment_end_string='#>',
+    autoescape=False,
+)
+_ENV.filters['ordinal'] = _ordinal
+_ENV.filters['dropcap'] = _dropcap
+_ENV.filters['tex'] = _tex
+
+# Compiled once at import and reused for every request
+_LATEX_TPL = _ENV.from_string(TEMPLATE_SRC)
+
+# Everything before \begin{document} is static and can be dumped into a format
+_PREAMBLE_SRC = TEMPLATE_SRC[:TEMPLATE_SRC.index('\\begin{document}')]
+_LATEX_BODY_TPL = _ENV.from_string(TEMPLATE_SRC[len(_PREAMBLE_SRC):])
+
+# Precompiled format (.fmt) of the preamble, opt-in via PRECOMPILED_FMT=1.
+# A format is TeX code that runs in every compile, so the default directory is
+# per user and an existing format is only used if nobody else could have
+# written it.
+FORMAT_DIR = os.environ.get('FORMAT_DIR', os.path.join(tempfile.gettempdir(), f'ieee_formater_fmt-{os.getuid()}'))
+
+def _is_trusted(path):
+    """True if path is not a symlink, is owned by us or root and is not group/world-writable"""
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return False
+    return (not stat.S_ISLNK(st.st_mode)
+            and st.st_uid in (os.getuid(), 0)
+            and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+
+def _log_tail(log_path, size=4096):
+    """Return the last size bytes of a pdflatex log, decoded for printing"""
+    try:
+        with open(log_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - size, 0))
+            return f.read().decode('utf-8', 'replace')
+    except OSError:
+        return "(no log written)"
+
+def build_latex_format():
+    """Dump the IEEE preamble into a pdflatex format with mylatexformat.
+
+    Returns the format name to pass to ``pdflatex -fmt``, or None if the
+    format could not be built. The name embeds a hash of the preamble, so a
+    changed template never picks up a stale format.
+    """
+    digest = hashlib.sha256(_PREAMBLE_SRC.encode('utf-8')).hexdigest()[:12]
+    fmt_name = f"ieee_{digest}"
+    fmt_path = os.path.join(FORMAT_DIR, fmt_name + '.fmt')
+
+    try:
+        # FORMAT_DIR may be a read-only mount holding a format built ahead of time
+        os.makedirs(FORMAT_DIR, mode=0o700, exist_ok=True)
+    except OSError as e:
+        print(f"Building LaTeX format failed: {str(e)}")
+        return None
+    if not _is_trusted(FORMAT_DIR):
+        print(f"Not using LaTeX format: {FORMAT_DIR} is writable by other users")
+        return None
+    if os.path.lexists(fmt_path):
+        if _is_trusted(fmt_path):
+            return fmt_name
+        print(f"Not using LaTeX format: {fmt_path} is not owned by this user or root, or is writable by others")
+        return None
+
+    try:
+        preamble_path = os.path.join(FORMAT_DIR, 'paper_preamble.tex')
+        with open(preamble_path, 'w', encoding='utf-8') as f:
+            f.write(_PREAMBLE_SRC + '\\begin{document}\n\\end{document}\n')
+
+        result = subprocess.run([
+            'pdflatex',
+            '-ini',
+            '-interaction=batchmode',
+            '-halt-on-error',
+            '-jobname=' + fmt_name,
+            '&pdflatex mylatexformat.ltx paper_preamble.tex'
+        ], cwd=FORMAT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"Building LaTeX format failed: {str(e)}")
+        return None
+
+    if result.returncode != 0 or not os.path.exists(fmt_path):
+        # batchmode prints nothing; -ini writes its log next to the format
+        print(f"Building LaTeX format failed: {_log_tail(os.path.join(FORMAT_DIR, fmt_name + '.log'))}")
+        return None
+    return fmt_name
+
+LATEX_FORMAT = build_latex_format() if os.environ.get('PRECOMPILED_FMT') == '1' else None
+
+# Looked up once; without pdflatex on PATH latex requests go straight to ReportLab
+_HAVE_PDFLATEX = shutil.which('pdflatex') is not None
+
+# pdflatex working directories are reused across requests instead of being
+# created and removed each time. They live on tmpfs where available.
+WORKDIR_POOL_SIZE = int(os.environ.get('WORKDIR_POOL_SIZE', '4'))
+_WORKDIR_ROOT = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+_WORKDIR_FILES = ('paper.tex', 'paper.aux', 'paper.log', 'paper.out', 'paper.pdf', 'paper.PDF')
+
+# Caps how many pdflatex jobs run at once on the host, across every thread of
+# every gunicorn worker. A slot is an exclusive flock on one of LATEX_SLOTS
+# lock files; the kernel releases it if the holding process dies.
+LATEX_SLOTS = int(os.environ.get('LATEX_SLOTS', str(os.cpu_count() or 2)))
+_LATEX_SLOT_DIR = os.path.join(_WORKDIR_ROOT, 'ieee_formater_slots')
+os.makedirs(_LATEX_SLOT_DIR, exist_ok=True)
+_LATEX_SLOT_PATHS = [os.path.join(_LATEX_SLOT_DIR, f'slot{i}.lock') for i in range(LATEX_SLOTS)]
+
+@contextlib.contextmanager
+def _latex_slot():
+    """Hold one host-wide pdflatex slot for the duration of the block"""
+    while True:
+        for path in _LATEX_SLOT_PATHS:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            try:
+                yield
+            finally:
+                os.close(fd)  # drops the lock
+            return
+        # All slots busy; compiles take seconds, so polling is cheap enough
+        time.sleep(0.05)
+
+def _init_workdir_pool():
+    """Create this process's working directories and fill the pool with them"""
+    global _WORKDIRS, _WORKDIR_POOL
+    _WORKDIRS = [tempfile.mkdtemp(prefix='ieee_fmt_', dir=_WORKDIR_ROOT) for _ in range(WORKDIR_POOL_SIZE)]
+    _WORKDIR_POOL = queue.Queue()
+    for work_dir in _WORKDIRS:
+        _WORKDIR_POOL.put(work_dir)
+
+_init_workdir_pool()
+# Forked workers (e.g. gunicorn --preload) must not share the parent's directories
+os.register_at_fork(after_in_child=_init_workdir_pool)
+
+def _release_workdir(work_dir):
+    """Remove the files a request left in work_dir and return it to the pool"""
+    for name in _WORKDIR_FILES:
+        try:
+            os.remove(os.path.join(work_dir, name))
+        except FileNotFoundError:
+            pass
+    _WORKDIR_POOL.put(work_dir)
+
+@atexit.register
+def _remove_workdirs():
+    for work_dir in _WORKDIRS:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# --- Form input ---
+# The JSON payload is unpacked once per request into these, so the renderers
+# use attribute access instead of repeating dict.get with defaults.
+
+@dataclass(slots=True)
+class Author:
+    """One entry of the form's authors list (field names match the JSON)"""
+    firstName: str = ''
+    lastName: str = ''
+    membership: str = ''
+    department: str = ''
+    organization: str = ''
+    cityCountry: str = ''
+    email: str = ''
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**{name: data.get(name) or '' for name in cls.__slots__})
+
+@dataclass(slots=True)
+class Section:
+    """One entry of the form's sections list"""
+    title: str = 'Section'
+    content: str = ''
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(title=data.get('title') or 'Section', content=data.get('content') or '')
+
+@dataclass(slots=True)
+class PaperInput:
+    """The paper form as posted by the frontend"""
+    title: str = 'Conference Paper Title'
+    funding: str = ''
+    paper_notice: str = ''
+    drop_cap: bool = True
+    authors: tuple = ()
+    abstract: str = ''
+    keywords: str = ''
+    sections: tuple = ()
+    references: tuple = ()  # non-blank lines of the references field
+
+    @classmethod
+    def from_json(cls, data):
+        # Missing and null fields both fall back to the defaults
+        return cls(
+            title=data.get('title') or 'Conference Paper Title',
+            funding=data.get('funding') or '',
+            paper_notice=data.get('paperNotice') or '',
+            # `or` would turn an explicit false into the default, so test for None
+            drop_cap=True if data.get('dropCap') is None else bool(data['dropCap']),
+            authors=tuple(Author.from_json(author) for author in data.get('authors') or ()),
+            abstract=data.get('abstract') or '',
+            keywords=data.get('keywords') or '',
+            sections=tuple(Section.from_json(section) for section in data.get('sections') or ()),
+            # Split once here; both engines only need the non-blank lines
+            references=tuple(filter(str.strip, (data.get('references') or '').splitlines())),
+        )
+
+def generate_latex_document(paper, body_only=False):
+    """Generate LaTeX code for IEEE conference paper based on a PaperInput
+
+    Returns the document as UTF-8 encoded bytes, ready to be written to disk.
+    With body_only the preamble is left out, for use with LATEX_FORMAT.
+    """
+    template = _LATEX_BODY_TPL if body_only else _LATEX_TPL
+    return template.render(
+        title=paper.title,
+        funding=paper.funding,
+        paper_notice=paper.paper_notice,
+        drop_cap=paper.drop_cap,
+        authors=paper.authors,
+        abstract=paper.abstract,
+        keywords=paper.keywords,
+        sections=paper.sections,
+        references=paper.references,
+    ).encode('utf-8')
+
+_ROMAN_SYMBOLS = ((1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"),
+                  (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I"))
 
 def to_roman(num):
     """Convert integer to Roman numeral"""
-    val = [1000, 900, 500, 400, 100, 90, 50, 40, 10, 9, 5, 4, 1]
-    syb = ["M", "CM", "D", "CD", "C", "XC", "L", "XL", "X", "IX", "V", "IV", "I"]
     roman_num = ""
-    for i in range(len(val)):
-        count = int(num / val[i])
-        roman_num += syb[i] * count
-        num -= val[i] * count
+    for value, symbol in _ROMAN_SYMBOLS:
+        count, num = divmod(num, value)
+        roman_num += symbol * count
     return roman_num
 
-@app.route('/api/generate-pdf', methods=['POST'])
-def generate_pdf():
+# Section numerals for any realistic paper, indexed by section number
+_ROMAN = ('',) + tuple(to_roman(n) for n in range(1, 64))
+
+
+# --- ReportLab fallback layout ---
+# Styles and page geometry only depend on A4 and the fixed margins, so they
+# are built once at import. Frames and PageTemplates keep layout state while a
+# document is being built, so those are still created per request.
+
+def _build_styles():
+    """Build the ParagraphStyles used by the ReportLab fallback"""
+    styles = getSampleStyleSheet()
+
+    # Title Style
+    title_style = ParagraphStyle(
+        'IEEE_Title',
+        parent=styles['Heading1'],
+        fontName='Times-Bold',
+        fontSize=24,
+        leading=28,
+        alignment=TA_CENTER,
+        spaceAfter=6,
+        textColor=colors.black
+    )
+
+    # Subtitle/Note Style
+    subtitle_style = ParagraphStyle(
+        'IEEE_Subtitle',
+        parent=styles['Normal'],
+        fontName='Times-Roman',
+        fontSize=8,
+        leading=10,
+        alignment=TA_CENTER,
+        spaceAfter=12
+    )
+
+    # Special Paper Notice Style
+    notice_style = ParagraphStyle(
+        'IEEE_Notice',
+        parent=styles['Normal'],
+        fontName='Times-Italic',
+        fontSize=10,
+        leading=12,
+        alignment=TA_CENTER,
+        spaceAfter=12
+    )
+
+    # Author Style
+    author_name_style = ParagraphStyle(
+        'IEEE_Author_Name',
+        parent=styles['Normal'],
+        fontName='Times-Roman',
+        fontSize=11,
+        leading=13,
+        alignment=TA_CENTER
+    )
+
+    author_affil_style = ParagraphStyle(
+        'IEEE_Author_Affil',
+        parent=styles['Normal'],
+        fontName='Times-Italic',
+        fontSize=10,
+        leading=12,
+        alignment=TA_CENTER
+    )
+
+    # Body Text Style (Times-Roman, Justified)
+    body_style = ParagraphStyle(
+        'IEEE_Body',
+        parent=styles['Normal'],
+        fontName='Times-Roman',
+        fontSize=10,
+        leading=12,
+        alignment=TA_JUSTIFY
+    )
+
+    # Heading sections
+    h1_style = ParagraphStyle(
+        'IEEE_H1',
+        parent=styles['Heading2'],
+        fontName='Times-Roman', # IEEE uses Small Caps often but Roman is fine
+        fontSize=10,
+        leading=12,
+        alignment=TA_CENTER,
+        spaceBefore=12,
+        spaceAfter=6,
+        textTransform='uppercase'
+    )
+
+    # Abstract / Index Terms
+    abs_style = ParagraphStyle('Abs', parent=body_style, fontName='Times-Bold', leftIndent=0, rightIndent=0)
+    kw_style = ParagraphStyle('Kw', parent=body_style, fontName='Times-Bold')
+
+    # One reference per paragraph, with the gap between entries built in
+    ref_style = ParagraphStyle('IEEE_Ref', parent=body_style, spaceAfter=4)
+
+    return SimpleNamespace(
+        title_style=title_style,
+        subtitle_style=subtitle_style,
+        notice_style=notice_style,
+        author_name_style=author_name_style,
+        author_affil_style=author_affil_style,
+        body_style=body_style,
+        h1_style=h1_style,
+        abs_style=abs_style,
+        kw_style=kw_style,
+        ref_style=ref_style,
+    )
+
+# Line breaks in user text (\n, \r\n or \r) become <br/> in Paragraph markup
+_NEWLINE_SUB = re.compile(r'\r\n?|\n').sub
+
+if _RL_AVAILABLE:
+    _STYLES = _build_styles()
+
+    _PAGE_WIDTH, _PAGE_HEIGHT = A4
+    _LEFT_MARGIN = 0.6*inch
+    _RIGHT_MARGIN = 0.6*inch
+    _TOP_MARGIN = 0.7*inch
+    _BOTTOM_MARGIN = 0.7*inch
+
+    _FULL_WIDTH = _PAGE_WIDTH - _LEFT_MARGIN - _RIGHT_MARGIN
+    _COL_GAP = 0.2*inch
+    _COL_WIDTH = (_FULL_WIDTH - _COL_GAP) / 2
+    _COL2_X = _LEFT_MARGIN + _COL_WIDTH + _COL_GAP
+    _NORMAL_COL_HEIGHT = _PAGE_HEIGHT - _TOP_MARGIN - _BOTTOM_MARGIN
+    # Below this, columns under the header would hold only a few lines, so they
+    # start on the next page instead
+    _MIN_COL_HEIGHT = 1*inch
+
+    _AUTHOR_TABLE_STYLE = TableStyle([
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+        ('LEFTPADDING', (0,0), (-1,-1), 2),
+        ('RIGHTPADDING', (0,0), (-1,-1), 2),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
+    ])
+
+    class _StartColumns(ActionFlowable):
+        """Ends the full-width header frame and starts both columns right below it.
+
+        The first-page column frames are only sized here, once the header has
+        actually been laid out, so the header is never wrapped twice.
+        """
+
+        def apply(self, doc):
+            if doc.frame.id != 'header':
+                return  # already in the columns
+            # Every page after this one has two full-height columns
+            doc.handle_nextPageTemplate('NormalPage')
+
+            col_height = doc.frame._y - _BOTTOM_MARGIN
+            if col_height >= _MIN_COL_HEIGHT:
+                doc.pageTemplate.frames[1:] = [
+                    Frame(_LEFT_MARGIN, _BOTTOM_MARGIN, _COL_WIDTH, col_height, id='col1_first', showBoundary=0),
+                    Frame(_COL2_X, _BOTTOM_MARGIN, _COL_WIDTH, col_height, id='col2_first', showBoundary=0),
+                ]
+            # With no column frames added the header frame is the last one, so
+            # this ends the page
+            doc.handle_frameEnd()
+
+def _page_templates():
+    """Build the first-page and normal PageTemplates"""
+    # Layout: Top Header Area (for title/auth), then 2 Columns below. The header
+    # frame spans the whole page and FirstPage repeats until the header is
+    # done, so a header too long for one page continues at full width;
+    # _StartColumns then adds the column frames once the header's real height
+    # is known.
+    header_frame = Frame(_LEFT_MARGIN, _BOTTOM_MARGIN, _FULL_WIDTH, _NORMAL_COL_HEIGHT, id='header', showBoundary=0)
+
+    # Columns for Subsequent Pages (full height)
+    col1_normal = Frame(_LEFT_MARGIN, _BOTTOM_MARGIN, _COL_WIDTH, _NORMAL_COL_HEIGHT, id='col1_normal')
+    col2_normal = Frame(_COL2_X, _BOTTOM_MARGIN, _COL_WIDTH, _NORMAL_COL_HEIGHT, id='col2_normal')
+
+    template_first = PageTemplate(
+        id='FirstPage',
+        frames=[header_frame],
+        onPage=lambda canvas, doc: None, # No special drawing
+    )
+
+    template_normal = PageTemplate(
+        id='NormalPage',
+        frames=[col1_normal, col2_normal]
+    )
+
+    return template_first, template_normal
+
+# Log messages meaning the .aux written by this pass changes the output
+_RERUN_MARKERS = (b'Rerun to get', b'There were undefined references', b'There were undefined citations')
+
+def _needs_rerun(log_path):
+    """Check a pdflatex log for references that another pass would resolve"""
     try:
-        form_data = request.json
-        
-        # Extract variables from form data for use in both LaTeX and fallback
-        # Extract variables from form data for use in both LaTeX and fallback
-        title = form_data.get('title', 'Untitled Paper')
-        funding = form_data.get('funding', '')
-        paper_notice = form_data.get('paperNotice', '') # New field
-        drop_cap = form_data.get('dropCap', True) # New field
-        authors = form_data.get('authors', [])
-        abstract = form_data.get('abstract', '')
-        keywords = form_data.get('keywords', '')
-        sections = form_data.get('sections', [])
-        references = form_data.get('references', '')
-                
-        # Generate LaTeX code
-        latex_code = generate_latex_document(form_data)
-                
-        # Create temporary directory and files
-        temp_dir = tempfile.mkdtemp()
-        try:
-            tex_file_path = os.path.join(temp_dir, 'paper.tex')
-                    
-            # Write LaTeX code to file
-            with open(tex_file_path, 'w', encoding='utf-8') as f:
-                f.write(latex_code)
-                    
-            # Compile LaTeX to PDF using pdflatex
-            try:
+        with open(log_path, 'rb') as f:
+            log = f.read()
+    except FileNotFoundError:
+        return False
+    return any(marker in log for marker in _RERUN_MARKERS)
+
+def _render_pdflatex(paper):
+    """Compile the paper with pdflatex and return the PDF bytes"""
+    # Generate LaTeX code (the preamble is already in the format if we have one)
+    latex_code = _latex_source(paper)
+
+    # Borrow a working directory from the pool (blocks while all are busy)
+    work_dir = _WORKDIR_POOL.get()
+    try:
+        tex_file_path = os.path.join(work_dir, 'paper.tex')
+
+        # Write the already-encoded LaTeX straight to file (no text-mode layer)
+        with open(tex_file_path, 'wb') as f:
+            f.write(latex_code)
+
+        # Compile LaTeX to PDF using pdflatex, keeping its font cache out of $HOME
+        latex_env = dict(os.environ, TEXMFVAR=work_dir)
+        format_flags = []
+        if LATEX_FORMAT:
+            # Trailing separator keeps the default search path after FORMAT_DIR
+            latex_env['TEXFORMATS'] = FORMAT_DIR + os.pathsep
+            format_flags = ['-fmt=' + LATEX_FORMAT]
+
+        # Hold a compile slot for both passes so pdflatex runs don't oversubscribe the CPU
+        with _latex_slot():
+            # One full pass is enough unless it leaves citations or labels
+            # unresolved, in which case a second pass picks them up from the .aux
+            for _ in range(2):
                 result = subprocess.run([
-                    'pdflatex', 
-                    '-include-directory=' + temp_dir,
-                    '-output-directory=' + temp_dir,
+                    'pdflatex',
+                    *format_flags,
+                    '-interaction=batchmode',
+                    '-halt-on-error',
+                    '-output-directory=' + work_dir,
                     tex_file_path
-                ], capture_output=True, text=True, timeout=30)
-                        
+                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30, env=latex_env)
+
                 if result.returncode != 0:
-                    print(f"LaTeX compilation failed: {result.stderr}")
+                    # batchmode prints nothing; the errors are in paper.log, which
+                    # has to be read now because the directory is cleaned on release
+                    print(f"LaTeX compilation failed: {_log_tail(os.path.join(work_dir, 'paper.log'))}")
                     raise Exception("LaTeX compilation failed")
-                            
-                pdf_file_path = os.path.join(temp_dir, 'paper.pdf')
-                        
-                # Check if PDF was created
-                if not os.path.exists(pdf_file_path):
-                    # Try alternative PDF names
-                    alt_pdf_path = os.path.join(temp_dir, 'paper.PDF')
-                    if os.path.exists(alt_pdf_path):
-                        pdf_file_path = alt_pdf_path
-                    else:
-                        raise FileNotFoundError("PDF file was not created")
-                                
-            except (FileNotFoundError, subprocess.TimeoutExpired, Exception) as e:
-                print(f"LaTeX compilation failed: {str(e)}. Using fallback method.")
-                
-                # High-quality fallback using ReportLab Platypus
-                from reportlab.lib.pagesizes import A4
-                from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, Table, TableStyle, Flowable
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
-                from reportlab.lib import colors
-                from reportlab.lib.units import inch, mm
-                
-                # Setup document
-                buffer = io.BytesIO()
-                doc = BaseDocTemplate(buffer, pagesize=A4,
-                                    leftMargin=0.6*inch, rightMargin=0.6*inch,
-                                    topMargin=0.7*inch, bottomMargin=0.7*inch)
-                
-                # Styles
-                styles = getSampleStyleSheet()
-                
-                # Title Style
-                title_style = ParagraphStyle(
-                    'IEEE_Title',
-                    parent=styles['Heading1'],
-                    fontName='Times-Bold',
-                    fontSize=24,
-                    leading=28,
-                    alignment=TA_CENTER,
-                    spaceAfter=6,
-                    textColor=colors.black
-                )
-                
-                # Subtitle/Note Style
-                subtitle_style = ParagraphStyle(
-                    'IEEE_Subtitle',
-                    parent=styles['Normal'],
-                    fontName='Times-Roman',
-                    fontSize=8,
-                    leading=10,
-                    alignment=TA_CENTER,
-                    spaceAfter=12
-                )
-                
-                 # Special Paper Notice Style
-                notice_style = ParagraphStyle(
-                    'IEEE_Notice',
-                    parent=styles['Normal'],
-                    fontName='Times-Italic',
-                    fontSize=10,
-                    leading=12,
-                    alignment=TA_CENTER,
-                    spaceAfter=12
-                )
-
-                # Author Style
-                author_name_style = ParagraphStyle(
-                    'IEEE_Author_Name',
-                    parent=styles['Normal'],
-                    fontName='Times-Roman',
-                    fontSize=11,
-                    leading=13,
-                    alignment=TA_CENTER
-                )
-                
-                author_affil_style = ParagraphStyle(
-                    'IEEE_Author_Affil',
-                    parent=styles['Normal'],
-                    fontName='Times-Italic',
-                    fontSize=10,
-                    leading=12,
-                    alignment=TA_CENTER
-                )
-                
-                # Body Text Style (Times-Roman, Justified)
-                body_style = ParagraphStyle(
-                    'IEEE_Body',
-                    parent=styles['Normal'],
-                    fontName='Times-Roman',
-                    fontSize=10,
-                    leading=12,
-                    alignment=TA_JUSTIFY
-                )
-                
-                # Drop Cap First Letter Style
-                drop_cap_style = ParagraphStyle(
-                    'IEEE_DropCap',
-                    parent=body_style,
-                    fontSize=24,
-                    leading=24,
-                    fontName='Times-Bold'
-                )
-
-                # Heading sections
-                h1_style = ParagraphStyle(
-                    'IEEE_H1',
-                    parent=styles['Heading2'],
-                    fontName='Times-Roman', # IEEE uses Small Caps often but Roman is fine
-                    fontSize=10,
-                    leading=12,
-                    alignment=TA_CENTER,
-                    spaceBefore=12,
-                    spaceAfter=6,
-                    textTransform='uppercase' 
-                )
-                
-                # --- Page Layout Definitions ---
-                page_width, page_height = A4
-                left_margin = 0.6*inch
-                right_margin = 0.6*inch
-                top_margin = 0.7*inch
-                bottom_margin = 0.7*inch
-                
-                # --- MEASURE HEADER HEIGHT DYNAMICALLY ---
-                # We need to know how tall the title, notices, authors, abstract, and keywords are
-                # so we can size the 'Header Frame' correctly and push the columns down.
-
-                available_width = page_width - left_margin - right_margin
-                
-                # We will collect the flowables for the header here first to measure them
-                header_story = []
-                
-                # 1. Title
-                t_para = Paragraph(title + "*", title_style)
-                header_story.append(t_para)
-                header_story.append(Paragraph("<i>*Note: Sub-titles are not captured for https://ieeexplore.ieee.org and should not be used</i>", subtitle_style))
-                
-                if paper_notice:
-                    header_story.append(Paragraph(paper_notice, notice_style))
-
-                if funding:
-                    header_story.append(Paragraph(f"<i>Funding: {funding}</i>", subtitle_style))
-                
-                header_story.append(Spacer(1, 10))
-                
-                # 2. Authors (Grid Layout)
-                # Group authors into rows of 3
-                author_rows = []
-                current_row = []
-                for i, author in enumerate(authors):
-                    # Format author text
-                    ordinal_suffix = "th"
-                    val = i + 1
-                    if val % 10 == 1 and val % 100 != 11: ordinal_suffix = "st"
-                    elif val % 10 == 2 and val % 100 != 12: ordinal_suffix = "nd"
-                    elif val % 10 == 3 and val % 100 != 13: ordinal_suffix = "rd"
-                    
-                    membership_txt = ""
-                    if author.get('membership'):
-                        membership_txt = f" <i>{author.get('membership')}</i>"
-
-                    name_text = f"{val}<sup>{ordinal_suffix}</sup> {author.get('firstName', '')} {author.get('lastName', '')}{membership_txt}"
-                    affil_text = f"{author.get('department', '')}<br/>{author.get('organization', '')}<br/>{author.get('cityCountry', '')}<br/>{author.get('email', '')}"
-                    
-                    # Create cell content
-                    cell_content = [
-                        Paragraph(name_text, author_name_style),
-                        Paragraph(affil_text, author_affil_style)
-                    ]
-                    current_row.append(cell_content)
-                    
-                    if len(current_row) == 3:
-                        author_rows.append(current_row)
-                        current_row = []
-                
-                if current_row:
-                    # Pad the last row if needed
-                    while len(current_row) < 3:
-                        current_row.append("")
-                    author_rows.append(current_row)
-                
-                # Create Table
-                if author_rows:
-                    table = Table(author_rows, colWidths=[available_width/3.0]*3)
-                    table.setStyle(TableStyle([
-                        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                        ('LEFTPADDING', (0,0), (-1,-1), 2),
-                        ('RIGHTPADDING', (0,0), (-1,-1), 2),
-                        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
-                    ]))
-                    header_story.append(table)
-                    header_story.append(Spacer(1, 10))
-                
-                # 3. Abstract
-                if abstract:
-                    abs_text = f"<b><i>Abstract</i></b>—{abstract.replace('Abstract—', '')}"
-                    header_story.append(Paragraph(abs_text, ParagraphStyle('Abs', parent=body_style, fontName='Times-Bold', leftIndent=0, rightIndent=0)))
-                    header_story.append(Spacer(1, 6))
-                
-                # 4. Keywords
-                if keywords:
-                    kw_text = f"<b><i>Index Terms</i></b>—{keywords.replace('Keywords—', '')}"
-                    header_story.append(Paragraph(kw_text, ParagraphStyle('Kw', parent=body_style, fontName='Times-Bold')))
-                    header_story.append(Spacer(1, 12))
-                    
-                # Calculate total height
-                total_header_height = 0
-                for elem in header_story:
-                    w, h = elem.wrap(available_width, page_height)
-                    total_header_height += h
-                
-                # Add a little buffer
-                header_buffer = 0.2 * inch
-                calculated_header_height = total_header_height + header_buffer
-                
-                # --- Construct Main Story ---
-                story = list(header_story)
-                
-                # 5. Sections
-                for i, section in enumerate(sections):
-                    # Section Title
-                    sec_num = to_roman(i + 1)
-                    sec_title = f"{sec_num}. {section.get('title', 'Section').upper()}"
-                    story.append(Paragraph(sec_title, h1_style))
-                    
-                    # Content
-                    content_txt = section.get('content', '')
-                    
-                    # Simulated Drop Cap for first section only
-                    # Note: We are already past the header, so this is in the columns now.
-                    if i == 0 and drop_cap and content_txt:
-                         # Simple simulation: Make first letter bigger and bold
-                         if len(content_txt) > 0:
-                            first_letter = content_txt[0]
-                            rest = content_txt[1:].replace('\n', '<br/>')
-                            content_clean = f'<font size="20"><b>{first_letter}</b></font>{rest}'
-                            story.append(Paragraph(content_clean, body_style))
-                    else:
-                        content_clean = content_txt.replace('\n', '<br/>')
-                        story.append(Paragraph(content_clean, body_style))
-                        
-                    story.append(Spacer(1, 10))
-                
-                # 6. References
-                if references:
-                    story.append(Paragraph("REFERENCES", h1_style))
-                    # Basic split
-                    ref_list = references.split('\n')
-                    for ref in ref_list:
-                        if ref.strip():
-                            story.append(Paragraph(ref, body_style))
-                            story.append(Spacer(1, 4))
-                
-                # --- Page Templates ---
-                # Define Frames
-                # Layout: Top Header Area (for title/auth), then 2 Columns below
-                
-                full_width = page_width - left_margin - right_margin
-                col_gap = 0.2*inch
-                col_width = (full_width - col_gap) / 2
-                
-                # Frame 1: Header (Dynamic Height)
-                header_frame = Frame(
-                    left_margin, 
-                    page_height - top_margin - calculated_header_height, 
-                    full_width, 
-                    calculated_header_height,
-                    id='header',
-                    showBoundary=0
-                )
-                
-                # Columns for First Page (starts below header)
-                # Height = (Top Y) - (Bottom Y)
-                # Top Y = page_height - top_margin - calculated_header_height - 0.1*inch
-                # Bottom Y = bottom_margin
-                first_page_col_height = page_height - top_margin - calculated_header_height - 0.1*inch - bottom_margin
-                
-                col1_first = Frame(
-                    left_margin, 
-                    bottom_margin, 
-                    col_width, 
-                    first_page_col_height,
-                    id='col1_first',
-                    showBoundary=0
-                )
-                
-                col2_first = Frame(
-                    left_margin + col_width + col_gap, 
-                    bottom_margin, 
-                    col_width, 
-                    first_page_col_height,
-                    id='col2_first',
-                    showBoundary=0
-                )
-                
-                # Columns for Subsequent Pages (full height)
-                col1_normal = Frame(
-                    left_margin, 
-                    bottom_margin, 
-                    col_width, 
-                    page_height - top_margin - bottom_margin,
-                    id='col1_normal'
-                )
-                
-                col2_normal = Frame(
-                    left_margin + col_width + col_gap, 
-                    bottom_margin, 
-                    col_width, 
-                    page_height - top_margin - bottom_margin,
-                    id='col2_normal'
-                )
-                
-                # Templates
-                template_first = PageTemplate(
-                    id='FirstPage', 
-                    frames=[header_frame, col1_first, col2_first],
-                    onPage=lambda canvas, doc: None # No special drawing
-                )
-                
-                template_normal = PageTemplate(
-                    id='NormalPage', 
-                    frames=[col1_normal, col2_normal]
-                )
-                
-                doc.addPageTemplates([template_first, template_normal])
-                
-                # Build
-                doc.build(story)
-                
-                buffer.seek(0)
-                
-                # Save to temp file
-                pdf_file_path = os.path.join(temp_dir, 'paper.pdf')
-                with open(pdf_file_path, 'wb') as f:
-                    f.write(buffer.getvalue())
-            
-            return send_file(pdf_file_path, as_attachment=True, download_name='ieee_conference_paper.pdf')
-        finally:
-            # Clean up temp directory after sending the file
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
+
+                if not _needs_rerun(os.path.join(work_dir, 'paper.log')):
+                    break
+
+        pdf_file_path = os.path.join(work_dir, 'paper.pdf')
+
+        # Check if PDF was created
+        if not os.path.exists(pdf_file_path):
+            # Try alternative PDF names
+            alt_pdf_path = os.path.join(work_dir, 'paper.PDF')
+            if os.path.exists(alt_pdf_path):
+                pdf_file_path = alt_pdf_path
+            else:
+                raise FileNotFoundError("PDF file was not created")
+
+        # Read the PDF into memory so the working directory can be reused right away
+        with open(pdf_file_path, 'rb') as f:
+            return f.read()
+    finally:
+        _release_workdir(work_dir)
+
+def _section_flowables(i, section, drop_cap):
+    """Yield the heading, body and trailing gap for the i-th section"""
+    sec_num = _ROMAN[i + 1] if i + 1 < len(_ROMAN) else to_roman(i + 1)
+    yield Paragraph(f"{sec_num}. {section.title.upper()}", _STYLES.h1_style)
+
+    # Content (one pass over the text, newlines become <br/>)
+    content_txt = section.content
+    content_clean = _NEWLINE_SUB('<br/>', content_txt)
+
+    # Simulated Drop Cap for first section only
+    # Note: We are already past the header, so this is in the columns now.
+    if i == 0 and drop_cap and content_txt[:1] not in ('', '\r', '\n'):
+        # Simple simulation: Make first letter bigger and bold
+        content_clean = f'<font size="20"><b>{content_clean[0]}</b></font>{content_clean[1:]}'
+    yield Paragraph(content_clean, _STYLES.body_style)
+
+    yield Spacer(1, 10)
+
+def _render_reportlab(paper):
+    """Lay out the paper with ReportLab Platypus and return the PDF bytes"""
+    if not _RL_AVAILABLE:
+        raise RuntimeError("ReportLab is not installed")
+    
+    title = paper.title
+    funding = paper.funding
+    paper_notice = paper.paper_notice
+    drop_cap = paper.drop_cap
+    authors = paper.authors
+    abstract = paper.abstract
+    keywords = paper.keywords
+    sections = paper.sections
+    references = paper.references
+
+    buffer = io.BytesIO()
+    doc = BaseDocTemplate(buffer, pagesize=A4,
+                        leftMargin=_LEFT_MARGIN, rightMargin=_RIGHT_MARGIN,
+                        topMargin=_TOP_MARGIN, bottomMargin=_BOTTOM_MARGIN)
+
+    title_style = _STYLES.title_style
+    subtitle_style = _STYLES.subtitle_style
+    notice_style = _STYLES.notice_style
+    h1_style = _STYLES.h1_style
+
+    # --- HEADER (full width) ---
+    # Title, notices, authors, abstract and keywords flow into the full-width
+    # header frame; _StartColumns then switches to the two columns below them.
+
+    available_width = _FULL_WIDTH
+
+    header_story = []
+
+    # 1. Title
+    t_para = Paragraph(title + "*", title_style)
+    header_story.append(t_para)
+    header_story.append(Paragraph("<i>*Note: Sub-titles are not captured for https://ieeexplore.ieee.org and should not be used</i>", subtitle_style))
+
+    if paper_notice:
+        header_story.append(Paragraph(paper_notice, notice_style))
+
+    if funding:
+        header_story.append(Paragraph(f"<i>Funding: {funding}</i>", subtitle_style))
+
+    header_story.append(Spacer(1, 10))
+
+    # 2. Authors (Grid Layout)
+    # Group authors into rows of 3
+    author_rows = []
+    current_row = []
+    for i, author in enumerate(authors):
+        # Create cell content
+        val = i + 1
+        # Author fields are plain text, so escape them for Paragraph markup
+        membership_txt = f" <i>{escape(author.membership)}</i>" if author.membership else ""
+        name_text = f"{val}<sup>{_ordinal(val)}</sup> {escape(author.firstName)} {escape(author.lastName)}{membership_txt}"
+        affil_text = '<br/>'.join(escape(line) for line in (author.department, author.organization, author.cityCountry, author.email))
+        current_row.append([
+            Paragraph(name_text, _STYLES.author_name_style),
+            Paragraph(affil_text, _STYLES.author_affil_style),
+        ])
+
+        if len(current_row) == 3:
+            author_rows.append(current_row)
+            current_row = []
+
+    if current_row:
+        # Pad the last row if needed
+        while len(current_row) < 3:
+            current_row.append("")
+        author_rows.append(current_row)
+
+    # Create Table
+    if author_rows:
+        table = Table(author_rows, colWidths=[available_width/3.0]*3)
+        table.setStyle(_AUTHOR_TABLE_STYLE)
+        header_story.append(table)
+        header_story.append(Spacer(1, 10))
+
+    # 3. Abstract
+    if abstract:
+        abs_text = f"<b><i>Abstract</i></b>—{abstract.removeprefix('Abstract—')}"
+        header_story.append(Paragraph(abs_text, _STYLES.abs_style))
+        header_story.append(Spacer(1, 6))
+
+    # 4. Keywords
+    if keywords:
+        kw_text = f"<b><i>Index Terms</i></b>—{keywords.removeprefix('Keywords—')}"
+        header_story.append(Paragraph(kw_text, _STYLES.kw_style))
+        header_story.append(Spacer(1, 12))
+
+    # --- Construct Main Story ---
+    story = header_story
+    story.append(_StartColumns())
+
+    # 5. Sections
+    story.extend(x for i, section in enumerate(sections) for x in _section_flowables(i, section, drop_cap))
+
+    # 6. References (one per non-blank line)
+    if references:
+        story.append(Paragraph("REFERENCES", h1_style))
+        story.extend(Paragraph(ref, _STYLES.ref_style) for ref in references)
+
+    # --- Page Templates ---
+    template_first, template_normal = _page_templates()
+
+    doc.addPageTemplates([template_first, template_normal])
+
+    # Build
+    doc.build(story)
+
+    return buffer.getvalue()
+
+# Rendered PDFs keyed by engine and form content, so re-generating an
+# unchanged paper skips rendering entirely
+_PDF_CACHE = LRUCache(maxsize=64)
+_PDF_CACHE_LOCK = threading.Lock()  # also guards _LATEX_CACHE
+
+def _cache_key(paper, engine):
+    """Hash the paper content (key order independent) together with the engine"""
+    payload = orjson.dumps(paper, option=orjson.OPT_SORT_KEYS)
+    return engine, hashlib.blake2b(payload, digest_size=16).digest()
+
+# Generated LaTeX source, so a paper whose PDF was not cached (failed or
+# evicted compile) doesn't go through the template again
+_LATEX_CACHE = LRUCache(maxsize=256)
+
+# /api/cache/clear has to reach every gunicorn worker, not just the one that
+# served it. It replaces this file, and each worker compares the file's
+# identity with the one it last saw before reading its caches.
+_CACHE_GEN_PATH = os.path.join(_WORKDIR_ROOT, 'ieee_formater_cache.gen')
+_cache_gen = None
+
+def _sync_cache_generation():
+    """Drop this process's caches if they were cleared elsewhere (caller holds _PDF_CACHE_LOCK)"""
+    global _cache_gen
+    try:
+        st = os.stat(_CACHE_GEN_PATH)
+        gen = (st.st_ino, st.st_mtime_ns)
+    except FileNotFoundError:
+        gen = None
+    if gen != _cache_gen:
+        _PDF_CACHE.clear()
+        _LATEX_CACHE.clear()
+        _cache_gen = gen
+
+def _bump_cache_generation():
+    """Invalidate the caches of every worker on this host"""
+    tmp_path = f"{_CACHE_GEN_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(uuid.uuid4().hex.encode('ascii'))
+    os.replace(tmp_path, _CACHE_GEN_PATH)
+
+def _latex_source(paper):
+    """generate_latex_document for the current format setup, cached by content"""
+    body_only = LATEX_FORMAT is not None
+    key = _cache_key(paper, 'tex-body' if body_only else 'tex')
+    with _PDF_CACHE_LOCK:
+        _sync_cache_generation()
+        latex_code = _LATEX_CACHE.get(key)
+    if latex_code is None:
+        latex_code = generate_latex_document(paper, body_only=body_only)
+        with _PDF_CACHE_LOCK:
+            _LATEX_CACHE[key] = latex_code
+    return latex_code
+
+def _request_engine():
+    """Pick the renderer for this request: ReportLab unless ?engine=latex"""
+    default_engine = 'reportlab' if _RL_AVAILABLE else 'latex'
+    return 'latex' if request.args.get('engine', default_engine) == 'latex' else 'reportlab'
+
+def render_pdf(paper, engine):
+    """Render paper with the given engine, going through the PDF cache"""
+    if engine == 'latex' and not _HAVE_PDFLATEX:
+        # Known up front; these always get the ReportLab PDF, so share its cache entry
+        engine = 'reportlab'
+    key = _cache_key(paper, engine)
+    with _PDF_CACHE_LOCK:
+        _sync_cache_generation()
+        pdf_bytes = _PDF_CACHE.get(key)
+    if pdf_bytes is not None:
+        return pdf_bytes
+    
+    cacheable = True
+    if engine == 'latex':
+        try:
+            pdf_bytes = _render_pdflatex(paper)
+        except (FileNotFoundError, subprocess.TimeoutExpired, Exception) as e:
+            print(f"LaTeX compilation failed: {str(e)}. Using fallback method.")
+            pdf_bytes = _render_reportlab(paper)
+            # Don't pin a fallback PDF under the latex key; the failure may be transient
+            cacheable = False
+    else:
+        pdf_bytes = _render_reportlab(paper)
+    
+    if cacheable:
+        with _PDF_CACHE_LOCK:
+            _PDF_CACHE[key] = pdf_bytes
+    return pdf_bytes
+
+def _send_pdf(pdf_bytes):
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True, download_name='ieee_conference_paper.pdf')
+
+@app.route('/api/generate-pdf', methods=['POST'])
+def generate_pdf():
+    try:
+        # Parse the raw body directly; the payload is only read once
+        paper = PaperInput.from_json(orjson.loads(request.get_data(cache=False)))
+        
+        # ReportLab renders in-process; pdflatex is opt-in with ?engine=latex
+        return _send_pdf(render_pdf(paper, _request_engine()))
     
     except Exception as e:
         print(f"Error generating PDF: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# --- Background jobs ---
+# POST /api/jobs queues a render and returns 202 with a job id right away, so
+# slow pdflatex compiles don't pin an HTTP worker. Job state lives in files
+# under JOB_DIR so that any gunicorn worker on the host can answer
+# GET /api/jobs/<id>: <id>.pending while queued/running, then <id>.pdf or
+# <id>.err. A job still pending after JOB_TIMEOUT seconds (its worker died or
+# was restarted) is reported as failed. Files older than JOB_TTL seconds are
+# swept, and only the newest MAX_JOB_RESULTS finished results are kept, since
+# JOB_DIR is usually on tmpfs.
+# Results are users' papers, so JOB_DIR is private to this user (mode 0700,
+# files 0600) and an existing directory anyone else could read or write is
+# refused.
+JOB_DIR = os.environ.get('JOB_DIR', os.path.join(_WORKDIR_ROOT, f'ieee_formater_jobs-{os.getuid()}'))
+JOB_TTL = int(os.environ.get('JOB_TTL', '600'))
+JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', '120'))
+MAX_PENDING_JOBS = int(os.environ.get('MAX_PENDING_JOBS', '32'))
+MAX_JOB_RESULTS = int(os.environ.get('MAX_JOB_RESULTS', '64'))
+JOB_SWEEP_INTERVAL = 5
+_JOB_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+def _private_dir(path):
+    """Create path with mode 0700, or check that an existing one is ours and private"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise RuntimeError(f"{path} must be a directory owned by this user with mode 0700")
+
+_private_dir(JOB_DIR)
+
+_JOB_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+_pending_jobs = 0
+_pending_jobs_lock = threading.Lock()
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+def _job_path(job_id, ext):
+    return os.path.join(JOB_DIR, f"{job_id}.{ext}")
+
+def _write_job_file(job_id, ext, data):
+    """Atomically publish a job result file"""
+    tmp_path = _job_path(job_id, ext + '.tmp')
+    with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, _job_path(job_id, ext))
+
+def _run_job(job_id, paper, engine):
+    global _pending_jobs
+    try:
+        _write_job_file(job_id, 'pdf', render_pdf(paper, engine))
+    except Exception as e:
+        print(f"Error generating PDF: {str(e)}")
+        _write_job_file(job_id, 'err', str(e).encode('utf-8'))
+    finally:
+        try:
+            os.remove(_job_path(job_id, 'pending'))
+        except FileNotFoundError:
+            pass
+        with _pending_jobs_lock:
+            _pending_jobs -= 1
+
+def _sweep_jobs():
+    """Delete job files older than JOB_TTL and finished results beyond MAX_JOB_RESULTS"""
+    cutoff = time.time() - JOB_TTL
+    results = []
+    with os.scandir(JOB_DIR) as entries:
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+                if mtime < cutoff:
+                    os.remove(entry.path)
+                elif entry.name.endswith(('.pdf', '.err')):
+                    results.append((mtime, entry.path))
+            except FileNotFoundError:
+                pass
+
+    results.sort()
+    for _, path in results[:max(len(results) - MAX_JOB_RESULTS, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _maybe_sweep_jobs():
+    """Run _sweep_jobs at most every JOB_SWEEP_INTERVAL seconds per process"""
+    global _last_sweep
+    now = time.monotonic()
+    with _sweep_lock:
+        if now - _last_sweep < JOB_SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+    _sweep_jobs()
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    global _pending_jobs
+    try:
+        paper = PaperInput.from_json(orjson.loads(request.get_data(cache=False)))
+        engine = _request_engine()
+        
+        # Back-pressure: refuse new work rather than queueing without bound
+        with _pending_jobs_lock:
+            if _pending_jobs >= MAX_PENDING_JOBS:
+                return jsonify({'error': 'Too many pending jobs, try again later'}), 429
+            _pending_jobs += 1
+        
+        try:
+            _maybe_sweep_jobs()
+            job_id = uuid.uuid4().hex
+            _write_job_file(job_id, 'pending', b'')
+            _JOB_EXECUTOR.submit(_run_job, job_id, paper, engine)
+        except Exception:
+            with _pending_jobs_lock:
+                _pending_jobs -= 1
+            raise
+        return jsonify({'job_id': job_id}), 202
+    
+    except Exception as e:
+        print(f"Error queueing PDF job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    if not _JOB_ID_RE.fullmatch(job_id):
+        return jsonify({'error': 'Unknown job'}), 404
+    _maybe_sweep_jobs()
+    
+    try:
+        with open(_job_path(job_id, 'pdf'), 'rb') as f:
+            return _send_pdf(f.read())
+    except FileNotFoundError:
+        pass
+    try:
+        with open(_job_path(job_id, 'err'), 'rb') as f:
+            return jsonify({'state': 'failed', 'error': f.read().decode('utf-8', 'replace')}), 500
+    except FileNotFoundError:
+        pass
+    try:
+        pending_age = time.time() - os.stat(_job_path(job_id, 'pending')).st_mtime
+    except FileNotFoundError:
+        return jsonify({'error': 'Unknown job'}), 404
+    if pending_age > JOB_TIMEOUT:
+        # Nothing is going to finish this job any more
+        return jsonify({'state': 'failed', 'error': 'PDF generation timed out'}), 500
+    return jsonify({'state': 'pending'}), 202
+
+# Cache clearing is an admin action: it is disabled unless CACHE_ADMIN_TOKEN is
+# set, and callers must send that token in the X-Admin-Token header
+CACHE_ADMIN_TOKEN = os.environ.get('CACHE_ADMIN_TOKEN', '')
+
+@app.route('/api/cache/clear', methods=['POST'])
+def clear_cache():
+    """Drop all cached PDFs and LaTeX sources in every worker on this host"""
+    if not CACHE_ADMIN_TOKEN:
+        return jsonify({'error': 'Cache clearing is disabled'}), 403
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), CACHE_ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Invalid admin token'}), 403
+
+    _bump_cache_generation()
+    with _PDF_CACHE_LOCK:
+        _sync_cache_generation()
+    return jsonify({"message": "Caches cleared"})
+
+@app.cli.command('build-latex-format')
+def build_latex_format_command():
+    """Build the precompiled LaTeX format into FORMAT_DIR (for image build steps)"""
+    fmt_name = build_latex_format()
+    if fmt_name is None:
+        raise SystemExit(1)
+    print(os.path.join(FORMAT_DIR, fmt_name + '.fmt'))
+
 @app.route('/')
 def home():
     return jsonify({"message": "IEEE Paper Generator API is running!"})
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Development server only; deploy with gunicorn (see gunicorn_conf.py)
+    app.run(port=5000)
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Gunicorn configuration for the IEEE Paper Generator API.
+
+Start from the backend directory with:
+
+    gunicorn -c gunicorn_conf.py app:app
+
+The app is preloaded in the master, so the compiled LaTeX template, the
+ReportLab styles and the optional precompiled LaTeX format are built once and
+shared with every worker. Each worker still gets its own pdflatex working
+directories, PDF/LaTeX caches, job executor and pending-job limit.
+
+Worker count trade-off: those caches and limits are per process, so with N
+workers a repeated "Generate" only hits the PDF cache about 1/N of the time,
+and WORKDIR_POOL_SIZE, MAX_PENDING_JOBS and the job executor are multiplied
+by N. We therefore run few workers with many threads. pdflatex runs in child
+processes, so threads are enough to keep it busy (host-wide it is capped by
+LATEX_SLOTS anyway). ReportLab rendering holds the GIL, so ReportLab
+throughput scales with workers, not threads; raise WEB_CONCURRENCY if that
+engine is CPU-bound and fewer cache hits are acceptable.
+
+Environment variables:
+
+    WEB_CONCURRENCY       gunicorn worker processes (default 2)
+    GUNICORN_THREADS      threads per worker (default 8)
+
+Read by app.py:
+
+    PRECOMPILED_FMT=1     dump the IEEE preamble into a pdflatex format at startup
+    FORMAT_DIR            where that format is stored; can be prebuilt with
+                          `flask --app app build-latex-format`
+    WORKDIR_POOL_SIZE     pdflatex working directories per worker (default 4)
+    LATEX_SLOTS           concurrent pdflatex runs on the host (default: CPU count)
+    MAX_PENDING_JOBS      queued/running /api/jobs per worker (default 32)
+    JOB_TIMEOUT           seconds before a pending job is reported failed (default 120)
+    MAX_JOB_RESULTS       finished job results kept in JOB_DIR (default 64)
+    CACHE_ADMIN_TOKEN     enables POST /api/cache/clear for callers sending it in
+                          the X-Admin-Token header (disabled when unset)
+"""
+import os
+
+bind = '0.0.0.0:5000'
+preload_app = True
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+# Longer than the 30s pdflatex timeout so slow compiles aren't killed mid-request
+timeout = 60
@@ -1,4 +1,4 @@
-from app import generate_latex_document
+from app import PaperInput, generate_latex_document
 
 mock_data = {
     "title": "My Awesome Paper",
@@ -26,7 +26,7 @@ mock_data = {
     "references": "\\bibitem{b1} Ref 1"
 }
 
-latex = generate_latex_document(mock_data)
-with open('verify_output_internal.tex', 'w') as f:
+latex = generate_latex_document(PaperInput.from_json(mock_data))
+with open('verify_output_internal.tex', 'wb') as f:
     f.write(latex)
 print("Wrote to verify_output_internal.tex")
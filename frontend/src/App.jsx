@@ -1,6 +1,10 @@
 import React, { useState } from 'react';
 import './App.css';
 
+// Job polling: every 500ms for up to two minutes (the backend's JOB_TIMEOUT)
+const POLL_INTERVAL_MS = 500;
+const MAX_POLLS = 240;
+
 const App = () => {
   const [formData, setFormData] = useState({
     title: '',
@@ -18,6 +22,7 @@ const App = () => {
   });
 
   const [pdfUrl, setPdfUrl] = useState(null);
+  const [error, setError] = useState(null);
 
   const handleInputChange = (field, value) => {
     setFormData(prev => ({
@@ -56,26 +61,49 @@ const App = () => {
 
   const handleSubmit = async (e) => {
     e.preventDefault();
+    setError(null);
     
     try {
-      // Send form data to backend to generate PDF
-      const response = await fetch('/api/generate-pdf', {
+      // Queue the PDF job on the backend
+      const jobResponse = await fetch('/api/jobs', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
         },
         body: JSON.stringify(formData)
       });
-      
+
+      if (!jobResponse.ok) {
+        console.error('Error generating PDF');
+        setError('The PDF could not be queued. Please try again.');
+        return;
+      }
+      const { job_id: jobId } = await jobResponse.json();
+
+      // Poll until the job has finished (202 means still pending), giving up
+      // after MAX_POLLS so a lost job can't keep the page waiting forever
+      let response;
+      let polls = 0;
+      do {
+        if (polls++ >= MAX_POLLS) {
+          setError('PDF generation timed out. Please try again.');
+          return;
+        }
+        await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL_MS));
+        response = await fetch(`/api/jobs/${jobId}`);
+      } while (response.status === 202);
+
       if (response.ok) {
         const blob = await response.blob();
         const url = window.URL.createObjectURL(blob);
         setPdfUrl(url);
       } else {
         console.error('Error generating PDF');
+        setError('PDF generation failed. Please try again.');
       }
     } catch (error) {
       console.error('Error:', error);
+      setError('PDF generation failed. Please try again.');
     }
   };
 
@@ -303,6 +331,12 @@ const App = () => {
           </div>
         </form>
 
+        {error && (
+          <div className="error-section">
+            <p>{error}</p>
+          </div>
+        )}
+
         {pdfUrl && (
           <div className="download-section">
             <h3>Your IEEE Paper is Ready!</h3>